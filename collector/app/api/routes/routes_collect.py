@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Query
-from typing import Annotated
+from typing import Annotated, List
 from datetime import datetime
 
 from collector.schemas.log import Log
@@ -16,6 +16,14 @@ def collect_log(log: Log):
     redis_service.publish("events", log.dict())
     return {"status": "received", "method": "POST"}
 
+@router.post("/logs/batch")
+def collect_logs_batch(logs: List[Log]):
+    """
+    Ingest several logs in a single POST request.
+    """
+    redis_service.publish_many("events", [log.dict() for log in logs])
+    return {"status": "received", "method": "POST", "count": len(logs)}
+
 @router.get("/logs")
 def collect_log_get(
     user_id: str,
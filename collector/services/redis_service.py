@@ -13,5 +13,12 @@ class RedisService:
         """Publish a message to a Redis channel."""
         self.client.publish(channel, json.dumps(message, default=str))
 
+    def publish_many(self, channel: str, messages: list):
+        """Publish several messages to a Redis channel in one round-trip."""
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipe.publish(channel, json.dumps(message, default=str))
+        pipe.execute()
+
     def get_client(self):
         return self.client
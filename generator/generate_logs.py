@@ -14,14 +14,22 @@ Usage:
   python generate_logs.py --type blacklist
   python generate_logs.py --type whitelist
   python generate_logs.py --type all
+  python generate_logs.py --type all --spool failed.ndjson
+  python generate_logs.py --replay failed.ndjson
 """
 
 import argparse
+import os
 import sys
+import threading
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 
 # SCENARIO DEFINITIONS
@@ -106,38 +114,158 @@ SCENARIOS = {
     },
 }
 
+# TIMESTAMPS
+
+@lru_cache(maxsize=1)
+def _date_prefix(day: int) -> str:
+    """ISO date prefix (YYYY-MM-DDT) for a day number since the epoch."""
+    return time.strftime("%Y-%m-%dT", time.gmtime(day * 86400))
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as ISO-8601, e.g. 2025-12-14T12:00:00.123456+00:00."""
+    secs, micro = divmod(time.time_ns() // 1_000, 1_000_000)
+    day, secs = divmod(secs, 86400)
+    hh, rem = divmod(secs, 3600)
+    mm, ss = divmod(rem, 60)
+    # Like datetime.isoformat(), the fraction is omitted when it is zero
+    frac = f".{micro:06d}" if micro else ""
+    return f"{_date_prefix(day)}{hh:02d}:{mm:02d}:{ss:02d}{frac}+00:00"
+
 # LOG SENDER
 
 class LogSender:
     """Sends logs to the collector service."""
 
-    def __init__(self, collector_url: str, timeout: int = 10):
+    def __init__(
+        self,
+        collector_url: str,
+        timeout: int = 10,
+        max_workers: int = 16,
+        spool_path: str = None,
+    ):
         self.collector_url = collector_url
+        self.batch_url = collector_url.rstrip("/") + "/batch"
+        self.health_url = collector_url.replace("/logs", "/health")
         self.timeout = timeout
+        self.max_workers = max_workers
+        self.spool_path = spool_path
+        self._spool_lock = threading.Lock()
         self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+
+        # Keep one pooled connection per concurrent fallback sender, and retry
+        # transient collector errors with backoff before counting a failure.
+        # Only retry where the collector cannot have published the logs yet:
+        # connect errors and 429/503. Read timeouts and 502/504 may follow a
+        # publish, and a retried POST would then duplicate the events.
+        retry = Retry(
+            total=3,
+            read=0,
+            other=0,
+            backoff_factor=0.2,
+            status_forcelist=[429, 503],
+            allowed_methods=["GET", "POST"],
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_workers,
+            max_retries=retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def send(self, log: dict) -> bool:
         """Send a single log to the collector."""
         try:
             response = self.session.post(
                 self.collector_url,
-                json=log,
+                data=orjson.dumps(log),
                 timeout=self.timeout
             )
             response.raise_for_status()
             return True
         except requests.exceptions.RequestException as e:
             print(f"  [ERROR] Failed to send: {e}")
+            self._spool([log])
             return False
 
+    def send_batch(self, logs: list) -> int:
+        """Send several logs to the collector in a single request; returns how many were accepted."""
+        try:
+            response = self.session.post(
+                self.batch_url,
+                data=orjson.dumps(logs),
+                timeout=self.timeout
+            )
+            if response.status_code in (404, 405):
+                # Collector without /logs/batch: fall back to concurrent per-log POSTs
+                workers = max(1, min(self.max_workers, len(logs)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    return sum(pool.map(self.send, logs))
+            response.raise_for_status()
+            return len(logs)
+        except requests.exceptions.RequestException as e:
+            print(f"  [ERROR] Failed to send batch: {e}")
+            self._spool(logs)
+            return 0
+
+    def _spool(self, logs: list) -> None:
+        """Append unsent logs to the spool file as NDJSON for a later --replay."""
+        if not self.spool_path:
+            return
+        data = b"".join(orjson.dumps(log) + b"\n" for log in logs)
+        with self._spool_lock, open(self.spool_path, "ab") as f:
+            f.write(data)
+
     def health_check(self) -> bool:
         try:
-            health_url = self.collector_url.replace("/logs", "/health")
-            response = self.session.get(health_url, timeout=5)
+            response = self.session.get(self.health_url, timeout=5)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
 
+# REPLAY
+
+def read_spool(path: str):
+    """Load logs from an NDJSON spool file; returns None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            return [orjson.loads(line) for line in f if line.strip()]
+    except (OSError, orjson.JSONDecodeError) as e:
+        print(f"[ERROR] Could not read spool file {path}: {e}")
+        return None
+
+
+def replay_spool(path: str, collector_url: str) -> bool:
+    """Resend logs spooled by a previous run; FILE keeps only the logs that still fail."""
+    logs = read_spool(path)
+    if logs is None:
+        return False
+
+    print()
+    print(f"  Replaying {len(logs)} spooled logs from {path}...")
+    if not logs:
+        return True
+
+    # Failures go to a scratch spool that replaces FILE afterwards, so logs
+    # that were accepted are never resent by a later replay
+    retry_path = path + ".retry"
+    if os.path.exists(retry_path):
+        os.remove(retry_path)
+    sender = LogSender(collector_url, spool_path=retry_path)
+    sent = sender.send_batch(logs)
+
+    if sent < len(logs):
+        if os.path.exists(retry_path):
+            os.replace(retry_path, path)
+        print(f"  Status: FAILED ({len(logs) - sent} logs kept in spool file)")
+        return False
+
+    open(path, "wb").close()
+    print("  Status: SENT (spool file cleared)")
+    return True
+
 # SCENARIO RUNNER
 
 def run_scenario(scenario_type: str, sender: LogSender, delay: float = 0) -> bool:
@@ -157,21 +285,32 @@ def run_scenario(scenario_type: str, sender: LogSender, delay: float = 0) -> boo
 
     success_count = 0
     total = len(scenario["logs"])
+    deadline = time.monotonic()
+
+    # Without pacing, the whole scenario goes out as a single request
+    # stamped with one shared timestamp
+    batch = delay <= 0
+    batch_ts = utc_timestamp() if batch else None
+    pending = []
 
     for i, log_template in enumerate(scenario["logs"], 1):
         log = {
             **log_template,
-            "ts": datetime.now(timezone.utc).isoformat(),
+            "ts": batch_ts or utc_timestamp(),
         }
 
         print()
-        print(f"[{i}/{total}] Sending log...")
+        print(f"[{i}/{total}] {'Queued' if batch else 'Sending'} log...")
         print(f"User: {log['user_id']}")
         print(f"Domain: {log['domain']}")
         print(f"URL: {log['url']}")
         print(f"Method: {log['method']}")
         print(f"Size: {log['upload_size_bytes']:,} bytes")
 
+        if batch:
+            pending.append(log)
+            continue
+
         if sender.send(log):
             print("Status: SENT")
             success_count += 1
@@ -181,7 +320,15 @@ def run_scenario(scenario_type: str, sender: LogSender, delay: float = 0) -> boo
         # Delay between logs if specified
         if delay > 0 and i < total:
             print(f"Waiting {delay}s before next log...")
-            time.sleep(delay)
+            # Pace against a fixed schedule so send time doesn't add drift
+            deadline += delay
+            time.sleep(max(0.0, deadline - time.monotonic()))
+
+    if pending:
+        print()
+        print(f"Sending {len(pending)} logs in one batch...")
+        success_count = sender.send_batch(pending)
+        print("Status: SENT" if success_count == len(pending) else "Status: FAILED")
 
     print()
     print("-" * 60)
@@ -238,14 +385,15 @@ Examples:
   python generate_logs.py --type whitelist
   python generate_logs.py --type all
   python generate_logs.py --type shadow_ai --url http://your-server:3000/collect/logs
+  python generate_logs.py --type all --spool failed.ndjson
+  python generate_logs.py --replay failed.ndjson
         """,
     )
 
     parser.add_argument(
         "-t", "--type",
         choices=["shadow_ai", "blacklist", "whitelist", "all"],
-        required=True,
-        help="Scenario type to run",
+        help="Scenario type to run (required unless --replay is given)",
     )
 
     parser.add_argument(
@@ -274,7 +422,22 @@ Examples:
         help="Delay in seconds between scenarios when running 'all' (default: 0)",
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--spool",
+        metavar="FILE",
+        help="Append logs that fail to send to FILE as NDJSON",
+    )
+
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Resend logs from a spool FILE instead of running a scenario",
+    )
+
+    args = parser.parse_args()
+    if not args.type and not args.replay:
+        parser.error("one of --type or --replay is required")
+    return args
 
 
 def main() -> int:
@@ -286,12 +449,24 @@ def main() -> int:
     print("  SHADOWGUARD AI - LOG GENERATOR")
     print("=" * 60)
     print(f"  Collector: {args.url}")
-    print(f"  Scenario: {args.type}")
+    if args.replay:
+        print(f"  Replay: {args.replay}")
+    else:
+        print(f"  Scenario: {args.type}")
 
     # Dry run mode
     if args.dry_run:
         print("  Mode: DRY RUN (no logs sent)")
         print("-" * 60)
+
+        if args.replay:
+            logs = read_spool(args.replay)
+            if logs is None:
+                return 1
+            print(f"\n  {len(logs)} spooled logs:")
+            for log in logs:
+                print(f"    - {log.get('domain')} ({log.get('method')} {log.get('url')})")
+            return 0
         
         scenarios_to_show = SCENARIOS.keys() if args.type == "all" else [args.type]
         
@@ -303,7 +478,8 @@ def main() -> int:
         
         return 0
 
-    sender = LogSender(args.url)
+    # Replays manage their own spool, see replay_spool()
+    sender = LogSender(args.url, spool_path=None if args.replay else args.spool)
 
     # Health check
     print()
@@ -313,6 +489,11 @@ def main() -> int:
     else:
         print("  Collector: OFFLINE (proceeding anyway)")
 
+    if args.replay:
+        ok = replay_spool(args.replay, args.url)
+        print()
+        return 0 if ok else 1
+
     # Run scenario(s)
     if args.type == "all":
         run_all_scenarios(sender, args.delay, args.scenario_delay)
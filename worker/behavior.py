@@ -1,10 +1,45 @@
 import redis
 import os
+import time
+from collections import OrderedDict
+from typing import List
 
 # Configuration
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
 HISTORY_retention_SECONDS = 60 * 60 * 24 * 30  # Keep history for 30 days (optional)
+KNOWN_CACHE_SIZE = 50_000  # (user, domain) pairs remembered in-process
+KNOWN_CACHE_TTL_SECONDS = 5.0
+
+# Adds the domain to the user's history and returns 1 if it was new.
+# The expiry is only set on first visits, same as before, and the whole
+# check-and-record costs a single round-trip.
+RECORD_VISIT_LUA = """
+local added = redis.call('SADD', KEYS[1], ARGV[1])
+if added == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return added
+"""
+
+# One connection pool per Redis address, shared by every BehaviorEngine
+_POOLS = {}
+
+
+def get_connection_pool(host: str, port: int) -> redis.BlockingConnectionPool:
+    pool = _POOLS.get((host, port))
+    if pool is None:
+        # Blocking pool: callers wait for a free socket instead of opening more
+        pool = redis.BlockingConnectionPool(
+            host=host,
+            port=port,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=5,
+        )
+        _POOLS[(host, port)] = pool
+    return pool
 
 class BehaviorEngine:
     def __init__(self, host=None, port=None):
@@ -12,17 +47,47 @@ class BehaviorEngine:
         # Allow overriding for local testing
         _host = host if host else REDIS_HOST
         _port = port if port else REDIS_PORT
-        self.r = redis.Redis(host=_host, port=_port, decode_responses=True)
+        self.r = redis.Redis(connection_pool=get_connection_pool(_host, _port))
+        # Script object caches the SHA and falls back to EVAL if it's not loaded
+        self._record_visit = self.r.register_script(RECORD_VISIT_LUA)
+        # (user_id, domain) -> expiry; bursts to the same domain skip Redis
+        self._known = OrderedDict()
+
+    def _is_known(self, key) -> bool:
+        expires = self._known.get(key)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._known[key]
+            return False
+        self._known.move_to_end(key)
+        return True
+
+    def _remember(self, key):
+        self._known[key] = time.monotonic() + KNOWN_CACHE_TTL_SECONDS
+        self._known.move_to_end(key)
+        if len(self._known) > KNOWN_CACHE_SIZE:
+            self._known.popitem(last=False)
 
     def analyze(self, user_id: str, domain: str) -> dict:
+        if self._is_known((user_id, domain)):
+            return {
+                "behavior_score": 0.0,
+                "is_first_visit": False,
+                "reason": "Domain found in user history"
+            }
+
         try:
             user_key = f"history:{user_id}"
 
-            # 1. Check if domain exists in the user's history set
-            # sismember returns True if it exists, False if it doesn't.
-            is_known_domain = self.r.sismember(user_key, domain)
+            # 1. Record the domain in the user's history set.
+            # The script returns 1 if it was new, 0 if it was already there.
+            is_first_visit = self._record_visit(
+                keys=[user_key], args=[domain, HISTORY_retention_SECONDS]
+            ) == 1
+            self._remember((user_id, domain))
 
-            if is_known_domain:
+            if not is_first_visit:
                 # Code Path: User has been here before.
                 return {
                     "behavior_score": 0.0, # Safe / Normal
@@ -32,12 +97,7 @@ class BehaviorEngine:
             
             else:
                 # Code Path: First time visit!
-                # 2. Add it to history so it isn't flagged next time
-                self.r.sadd(user_key, domain)
-                
-                # (Optional) Set an expiry so Redis doesn't fill up forever
-                self.r.expire(user_key, HISTORY_retention_SECONDS)
-
+                # 2. Already added to history (with expiry) so it isn't flagged next time
                 return {
                     "behavior_score": 0.5, # Suspicious (Medium Risk)
                     "is_first_visit": True,
@@ -49,4 +109,50 @@ class BehaviorEngine:
                 "behavior_score": 0.0,
                 "is_first_visit": False, 
                 "reason": f"Analysis failed: {str(e)}"
-            }
\ No newline at end of file
+            }
+
+    def analyze_many(self, events: List[dict]) -> List[dict]:
+        """Analyze a burst of events with one pipelined round-trip."""
+        # Only events not already known in-process go to Redis
+        pending = [
+            i for i, event in enumerate(events)
+            if not self._is_known((event["user_id"], event["domain"]))
+        ]
+        try:
+            pipe = self.r.pipeline(transaction=False)
+            for i in pending:
+                event = events[i]
+                self._record_visit(
+                    keys=[f"history:{event['user_id']}"],
+                    args=[event["domain"], HISTORY_retention_SECONDS],
+                    client=pipe,
+                )
+            added = pipe.execute()
+        except Exception as e:
+            return [
+                {
+                    "behavior_score": 0.0,
+                    "is_first_visit": False,
+                    "reason": f"Analysis failed: {str(e)}"
+                }
+                for _ in events
+            ]
+
+        results = [
+            {
+                "behavior_score": 0.0,
+                "is_first_visit": False,
+                "reason": "Domain found in user history"
+            }
+            for _ in events
+        ]
+        for i, was_added in zip(pending, added):
+            event = events[i]
+            self._remember((event["user_id"], event["domain"]))
+            if was_added == 1:
+                results[i] = {
+                    "behavior_score": 0.5,
+                    "is_first_visit": True,
+                    "reason": "First time user has visited this domain"
+                }
+        return results
@@ -8,10 +8,14 @@ Key improvements:
 5. SINGLE SOURCE OF TRUTH: Uses config files for ALL definitions
 """
 
-import json
 import os
-from typing import Dict, Any, List
-from datetime import datetime
+import re
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Iterable, Mapping
+import orjson
 
 try:
     from dotenv import load_dotenv
@@ -19,6 +23,64 @@ try:
 except ImportError:
     pass
 
+# Per-event fusion trace; off by default since it formats and prints on every log
+FUSION_DEBUG = os.getenv("FUSION_DEBUG", "").lower() in ("1", "true", "yes")
+
+
+# URL path words that signal an upload; one C-level scan instead of one per keyword
+_UPLOAD_RE = re.compile(
+    r"upload|create|submit|paste|share|attach|send|transfer|export",
+    re.IGNORECASE
+)
+_WRITE_METHODS = frozenset({"POST", "PUT"})
+_CANONICAL_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"})
+
+# Risk level thresholds: score >= edge moves up one level
+_LEVEL_EDGES = (0.2, 0.4, 0.6, 0.8)
+_LEVEL_NAMES = ("SAFE", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+SAFE, LOW, MEDIUM, HIGH, CRITICAL = _LEVEL_NAMES
+
+# Upload size thresholds in KB: size > edge moves up one multiplier
+_SIZE_EDGES = (1, 10, 50)
+_SIZE_MULTS = (1.0, 1.2, 1.5, 1.8)
+
+# Shared read-only default for missing nested result sections
+_EMPTY = MappingProxyType({})
+
+# Marks a node in a domain trie where a list entry ends
+_TRIE_END = None
+
+
+@lru_cache(maxsize=1)
+def _utc_second_prefix(second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+
+
+def _utc_isoformat() -> str:
+    """Same output as datetime.utcnow().isoformat(); the seconds part is formatted once per second"""
+    second, micro = divmod(time.time_ns() // 1_000, 1_000_000)
+    prefix = _utc_second_prefix(second)
+    return f"{prefix}.{micro:06d}" if micro else prefix
+
+
+@lru_cache(maxsize=8192)
+def _normalize_domain_cached(domain: str) -> str:
+    """Strip scheme, www., path and port; memoized since traffic repeats domains"""
+    domain = domain.lower().strip()
+    if domain.startswith("https://"):
+        domain = domain[8:]
+    else:
+        domain = domain.removeprefix("http://")
+    domain = domain.removeprefix("www.")
+    return domain.split("/", 1)[0].split(":", 1)[0]
+
+
+@lru_cache(maxsize=32)
+def _read_json(path: str, mtime_ns: int):
+    """Parse a config file; cached per (path, mtime) so edits are picked up"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
 
 class ImprovedFusionEngine:
     """
@@ -26,6 +88,35 @@ class ImprovedFusionEngine:
     ALL definitions come from config files (no hardcoded mappings).
     """
     
+    # Risk-based alert presentation: level -> (emoji, recommended action)
+    _ALERT_CONFIG = {
+        CRITICAL: ("🚨", "Block immediately and investigate"),
+        HIGH: ("⚠️", "Review within 1 hour"),
+        MEDIUM: ("⚡", "Monitor for repeated activity"),
+        LOW: ("ℹ️", "Log for audit trail"),
+        SAFE: ("✅", "No action needed")
+    }
+    
+    # Explicit-list outcomes are constant; returned by reference, read-only
+    _WHITELIST_HIT = MappingProxyType({
+        "override": True,
+        "final_risk": 0.0,
+        "risk_level": SAFE,
+        "reason": "Domain is whitelisted"
+    })
+    _BLACKLIST_HIT = MappingProxyType({
+        "override": True,
+        "final_risk": 1.0,
+        "risk_level": CRITICAL,
+        "reason": "Domain is blacklisted"
+    })
+    _NO_OVERRIDE = MappingProxyType({
+        "override": False,
+        "final_risk": None,
+        "risk_level": "UNKNOWN",
+        "reason": ""
+    })
+    
     def __init__(
         self,
         behavior_weight: float = 0.2,  # Behavior is secondary signal
@@ -48,90 +139,85 @@ class ImprovedFusionEngine:
             self.behavior_weight = behavior_weight / total
             self.semantic_weight = semantic_weight / total
         
+        # Weights are fixed for the engine's lifetime; build the dict once
+        self._weights = {
+            "semantic": self.semantic_weight,
+            "behavior": self.behavior_weight
+        }
+        
         # Load config files
         self.blacklist = self._load_json(blacklist_path)
         self.whitelist = self._load_json(whitelist_path)
         
+        # Reversed-label tries so lookups don't scan the whole list
+        self._blacklist_trie = self._build_domain_trie(self.blacklist)
+        self._whitelist_trie = self._build_domain_trie(self.whitelist)
+        # Exact entries answer the common case with a single hash probe
+        self._blacklist_exact = frozenset(map(self._normalize_domain, self.blacklist))
+        self._whitelist_exact = frozenset(map(self._normalize_domain, self.whitelist))
+        
         print(f"✅ ImprovedFusionEngine initialized:")
         print(f"   - Behavior weight: {self.behavior_weight:.2f}")
         print(f"   - Semantic weight: {self.semantic_weight:.2f}")
         print(f"   - Blacklist: {len(self.blacklist)} domains")
         print(f"   - Whitelist: {len(self.whitelist)} domains")
     
-    def _load_json(self, path: str) -> List[str]:
-        """Load JSON file safely"""
+    def _load_json(self, path: str) -> FrozenSet[str]:
+        """Load JSON domain list safely (parsed once per path and mtime)"""
         try:
-            with open(path, "r") as f:
-                return json.load(f)
+            return frozenset(_read_json(path, os.stat(path).st_mtime_ns))
         except Exception as e:
             print(f"⚠ Warning: Could not load {path}: {e}")
-            return []
+            return frozenset()
     
-    def _normalize_domain(self, domain: str) -> str:
+    @staticmethod
+    def _normalize_domain(domain: str) -> str:
         """Normalize domain for comparison"""
-        domain = domain.lower().strip()
-        
-        if domain.startswith("http://"):
-            domain = domain[7:]
-        elif domain.startswith("https://"):
-            domain = domain[8:]
-        
-        if domain.startswith("www."):
-            domain = domain[4:]
-        
-        domain = domain.split("/")[0]
-        domain = domain.split(":")[0]
-        
-        return domain
+        return _normalize_domain_cached(domain)
     
-    def _check_explicit_lists(self, domain: str) -> Dict[str, Any]:
+    def _build_domain_trie(self, domain_list: Iterable[str]) -> Dict[str, Any]:
+        """Index normalized entries by reversed labels (api.google.com -> com, google, api)"""
+        trie = {}
+        for item in domain_list:
+            node = trie
+            for label in reversed(self._normalize_domain(item).split(".")):
+                node = node.setdefault(label, {})
+            node[_TRIE_END] = True
+        return trie
+    
+    def _trie_match(self, target: str, trie: Dict[str, Any]) -> bool:
+        """True if target equals an entry or is a subdomain of one"""
+        node = trie
+        for label in reversed(target.split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _TRIE_END in node:
+                return True
+        return False
+    
+    def _check_explicit_lists(self, domain: str) -> Mapping[str, Any]:
         """Check whitelist/blacklist from config files"""
         clean_domain = self._normalize_domain(domain)
         
-        def is_match(target: str, domain_list: List[str]) -> bool:
-            for item in domain_list:
-                item = self._normalize_domain(item)
-                if target == item or target.endswith("." + item):
-                    return True
-            return False
-        
         # Whitelist takes precedence
-        if is_match(clean_domain, self.whitelist):
-            return {
-                "override": True,
-                "final_risk": 0.0,
-                "risk_level": "SAFE",
-                "reason": "Domain is whitelisted"
-            }
+        if (clean_domain in self._whitelist_exact
+                or self._trie_match(clean_domain, self._whitelist_trie)):
+            return self._WHITELIST_HIT
         
         # Blacklist
-        if is_match(clean_domain, self.blacklist):
-            return {
-                "override": True,
-                "final_risk": 1.0,
-                "risk_level": "CRITICAL",
-                "reason": "Domain is blacklisted"
-            }
+        if (clean_domain in self._blacklist_exact
+                or self._trie_match(clean_domain, self._blacklist_trie)):
+            return self._BLACKLIST_HIT
         
-        return {
-            "override": False,
-            "final_risk": None,
-            "risk_level": "UNKNOWN",
-            "reason": ""
-        }
+        return self._NO_OVERRIDE
     
     def _calculate_risk_level(self, score: float) -> str:
         """Convert risk score to category"""
-        if score >= 0.8:
-            return "CRITICAL"
-        elif score >= 0.6:
-            return "HIGH"
-        elif score >= 0.4:
-            return "MEDIUM"
-        elif score >= 0.2:
-            return "LOW"
-        else:
-            return "SAFE"
+        if score != score:
+            # NaN fails every >= check in the old ladder, so it stays SAFE
+            return SAFE
+        return _LEVEL_NAMES[bisect_right(_LEVEL_EDGES, score)]
     
     def _detect_upload_intent(
         self, 
@@ -149,18 +235,13 @@ class ImprovedFusionEngine:
                 "reason": str
             }
         """
-        method = method.upper()
-        url_lower = url.lower()
+        if method not in _CANONICAL_METHODS:
+            method = method.upper()
         
         # Strong upload signals
-        if method in ["POST", "PUT"]:
+        if method in _WRITE_METHODS:
             # Check URL path for upload indicators
-            upload_keywords = [
-                "upload", "create", "submit", "paste", "share", 
-                "attach", "send", "transfer", "export"
-            ]
-            
-            has_upload_keyword = any(kw in url_lower for kw in upload_keywords)
+            has_upload_keyword = _UPLOAD_RE.search(url) is not None
             has_significant_size = upload_size_bytes > (100 * 1024)  # > 100KB
             
             if has_upload_keyword and has_significant_size:
@@ -209,15 +290,9 @@ class ImprovedFusionEngine:
         
         size_kb = upload_size_bytes / (1024)
         
-        # Scale by upload size
-        if size_kb > 50:
-            size_mult = 1.8
-        elif size_kb > 10:
-            size_mult = 1.5
-        elif size_kb > 1:
-            size_mult = 1.2
-        else:
-            size_mult = 1.0
+        # Scale by upload size (bisect_left keeps the strict ">" boundaries;
+        # NaN fails every ">" in the old ladder, so it gets no scaling)
+        size_mult = _SIZE_MULTS[bisect_left(_SIZE_EDGES, size_kb)] if size_kb == size_kb else 1.0
         
         # Weight by confidence
         confidence = upload_intent["confidence"]
@@ -262,14 +337,15 @@ class ImprovedFusionEngine:
         """
         # 1. Check for explicit overrides (from config/blacklist.json, config/whitelist.json)
         override = self._check_explicit_lists(domain)
+        upload_size_kb = round(upload_size_bytes / 1024, 2)
         if override["override"]:
             return {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": _utc_isoformat(),
                 "user_id": user_id,
                 "domain": domain,
                 "url": url,
                 "method": method,
-                "upload_size_kb": round(upload_size_bytes / (1024), 2),
+                "upload_size_kb": upload_size_kb,
                 "final_risk_score": override["final_risk"],
                 "risk_level": override["risk_level"],
                 "override": True,
@@ -286,8 +362,9 @@ class ImprovedFusionEngine:
         behavior_score = behavior_result.get("behavior_score", 0.0)
         semantic_score = semantic_result.get("risk_score", 0.0)
         
-        # 4. Apply confidence weighting to semantic score (if needed)
-        weighted_semantic = self._apply_confidence_weighting(semantic_score, semantic_result)
+        # 4. Confidence is already factored into the v2 semantic risk_score
+        # (see _apply_confidence_weighting), so no call is needed here
+        weighted_semantic = semantic_score
         
         # 5. Apply upload multiplier ONLY if actual upload detected
         upload_multiplier = self._calculate_upload_multiplier(upload_intent, upload_size_bytes)
@@ -309,12 +386,12 @@ class ImprovedFusionEngine:
         
         # 9. Build result
         result = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": _utc_isoformat(),
             "user_id": user_id,
             "domain": domain,
             "url": url,
             "method": method,
-            "upload_size_kb": round(upload_size_bytes / (1024), 2),
+            "upload_size_kb": upload_size_kb,
             
             # Final assessment
             "final_risk_score": round(fused_score, 3),
@@ -332,10 +409,7 @@ class ImprovedFusionEngine:
             
             # Fusion details
             "fusion_method": "intent_aware_weighted",
-            "weights": {
-                "semantic": self.semantic_weight,
-                "behavior": self.behavior_weight
-            },
+            "weights": self._weights,
             
             # Original analysis details
             "behavior_analysis": {
@@ -351,16 +425,17 @@ class ImprovedFusionEngine:
         }
         
         # DEBUG logging
-        print(
-            f"[FUSION] domain={domain} user={user_id} method={method} "
-            f"upload_mb={result['upload_size_kb']:.2f} "
-            f"semantic={result['semantic_score']:.3f} "
-            f"confidence={result['semantic_analysis']['confidence']:.3f} "
-            f"upload_intent={upload_intent['is_upload']} "
-            f"upload_mult={upload_multiplier:.2f} "
-            f"final={result['final_risk_score']:.3f} "
-            f"level={risk_level}"
-        )
+        if FUSION_DEBUG:
+            print(
+                f"[FUSION] domain={domain} user={user_id} method={method} "
+                f"upload_mb={upload_size_kb:.2f} "
+                f"semantic={result['semantic_score']:.3f} "
+                f"confidence={result['semantic_analysis']['confidence']:.3f} "
+                f"upload_intent={upload_intent['is_upload']} "
+                f"upload_mult={upload_multiplier:.2f} "
+                f"final={result['final_risk_score']:.3f} "
+                f"level={risk_level}"
+            )
         
         return result
     
@@ -374,20 +449,14 @@ class ImprovedFusionEngine:
         upload_mb = fused_result.get("upload_size_kb", 0)
         
         # Get category from semantic analysis (now from anchors.json)
-        semantic_analysis = fused_result.get("semantic_analysis", {})
+        semantic_analysis = fused_result.get("semantic_analysis") or _EMPTY
         category = semantic_analysis.get("top_category", "unknown")
         
-        upload_intent = fused_result.get("upload_intent", {})
+        upload_intent = fused_result.get("upload_intent") or _EMPTY
+        behavior_analysis = fused_result.get("behavior_analysis") or _EMPTY
         
         # Risk-based presentation
-        config = {
-            "CRITICAL": ("🚨", "Block immediately and investigate"),
-            "HIGH": ("⚠️", "Review within 1 hour"),
-            "MEDIUM": ("⚡", "Monitor for repeated activity"),
-            "LOW": ("ℹ️", "Log for audit trail"),
-            "SAFE": ("✅", "No action needed")
-        }
-        emoji, action = config.get(risk, ("📊", "Review"))
+        emoji, action = self._ALERT_CONFIG.get(risk, ("📊", "Review"))
         
         # Build alert
         parts = []
@@ -417,7 +486,7 @@ class ImprovedFusionEngine:
         elif confidence > 0.6:
             parts.append(f"  - Moderate match to {category} (confidence: {confidence:.0%})")
         
-        if fused_result.get("behavior_analysis", {}).get("is_first_visit"):
+        if behavior_analysis.get("is_first_visit"):
             parts.append("  - First-time access to this service")
         
         parts.append(f"\n{action}")
@@ -433,7 +502,7 @@ class MockBehaviorEngine:
         self.visited = set()
     
     def analyze(self, user_id: str, domain: str) -> dict:
-        key = f"{user_id}:{domain}"
+        key = (user_id, domain)
         is_first = key not in self.visited
         self.visited.add(key)
         
@@ -24,17 +24,17 @@ except ImportError:
 
 
 # Content consumption patterns
-INFORMATIONAL_DOMAINS = [
+INFORMATIONAL_DOMAINS = (
     "nytimes.com", "wsj.com", "reuters.com", "bloomberg.com", "cnn.com", "bbc.com",
     "wikipedia.org", "britannica.com", "stackoverflow.com", "github.com", 
     "google.com", "bing.com", "duckduckgo.com"
-]
+)
 
-INFORMATIONAL_PATH_PATTERNS = [
+INFORMATIONAL_PATH_PATTERNS = (
     "/docs", "/wiki", "/manual", "/guide", "/help", "/faq"
-]
+)
 
-SEARCH_PATTERNS = ["/search", "/q/", "?q=", "?query="]
+SEARCH_PATTERNS = ("/search", "/q/", "?q=", "?query=")
 
 
 class ImprovedSemanticDetector:
@@ -65,6 +65,7 @@ class ImprovedSemanticDetector:
         self.anchors_path = os.path.normpath(anchors_path)
         
         self.categories: Dict[str, List[str]] = {}
+        self._anchor_domains: Dict[str, Tuple[str, ...]] = {}  # Normalized once at load
         self.category_embeddings: Dict[str, Dict[str, Any]] = {}
         
         self.embedding_cache_path = "embedding_cache.json"
@@ -123,6 +124,10 @@ class ImprovedSemanticDetector:
         try:
             with open(self.anchors_path, "r") as f:
                 self.categories = json.load(f)
+            self._anchor_domains = {
+                category: tuple(d.lower().strip() for d in domains)
+                for category, domains in self.categories.items()
+            }
             print(f"✅ Loaded {len(self.categories)} categories from {self.anchors_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to load anchors.json: {e}")
@@ -335,11 +340,11 @@ class ImprovedSemanticDetector:
         sims = {}
         domain = domain.lower().strip()
         
-        for category, domains in self.categories.items():
+        for category, domains in self._anchor_domains.items():
             is_match = False
             for d in domains:
-                d = d.lower().strip()
-                if domain == d or domain.endswith("." + d):
+                # Exact or subdomain match, without building "." + d per entry
+                if domain.endswith(d) and (len(domain) == len(d) or domain[-len(d) - 1] == "."):
                     is_match = True
                     break
             
@@ -394,7 +399,8 @@ class ImprovedSemanticDetector:
         
         lower_domain = domain.lower()
         
-        if any(lower_domain == d or lower_domain.endswith("." + d) 
+        if any(lower_domain.endswith(d)
+               and (len(lower_domain) == len(d) or lower_domain[-len(d) - 1] == ".")
                for d in INFORMATIONAL_DOMAINS):
             return True
         
@@ -3,14 +3,14 @@ Worker (core of detection system)
 The brain of the detection system that orchestrates all analysis engines.
 """
 
-import json
 import os
 import signal
 import sys
 import time
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+import orjson
 import redis
 import requests
 from behavior import BehaviorEngine
@@ -22,6 +22,7 @@ from slack_notifier import SlackNotifier
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 EVENTS_CHANNEL = "events"
+EVENT_BATCH_SIZE = 100  # Max pending messages handled together
 ALERT_THRESHOLD = 0.7
 PERFORMANCE_TARGET_MS = 500
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -109,7 +110,7 @@ class ShadowGuardWorker:
             print(f"[ENGINE] Initialization failed: {e}")
             return False
 
-    def _process_log(self, log_data: dict) -> dict:
+    def _process_log(self, log_data: dict, behavior_result: Optional[dict] = None) -> dict:
         """Process a single log event through all analysis engines."""
         domain = log_data.get("domain", "")
         user_id = log_data.get("user_id", "")
@@ -120,8 +121,9 @@ class ShadowGuardWorker:
         # Semantic analysis (with URL for content consumption detection)
         semantic_result = self._semantic_engine.analyze(domain, url)
 
-        # Behavior analysis
-        behavior_result = self._behavior_engine.analyze(user_id, domain)
+        # Behavior analysis (already done when handling a batch)
+        if behavior_result is None:
+            behavior_result = self._behavior_engine.analyze(user_id, domain)
 
         # Fuse results using context-aware FusionEngine
         fused_result = self._fusion_engine.fuse(
@@ -137,7 +139,8 @@ class ShadowGuardWorker:
         return fused_result
 
     def _format_alert(self, result: dict, log_data: dict, processing_time_ms: float) -> str:
-        ts = log_data.get("ts", datetime.now().isoformat())
+        # Only format a fallback timestamp when the log didn't carry one
+        ts = log_data.get("ts") or datetime.now().isoformat()
         upload_size = log_data.get("upload_size_bytes", 0)
 
         # Use FusionEngine's built-in alert generator
@@ -197,7 +200,7 @@ Processing Time : {processing_time_ms:.1f}ms {'[OK]' if processing_time_ms < PER
             
             # Format alert for frontend
             alert = {
-                "id": str(uuid.uuid4()),
+                "id": uuid.uuid4().hex,
                 "risk_score": int(result["final_risk_score"] * 100),
                 "user": result["user_id"],
                 "department": "Unknown",
@@ -208,11 +211,12 @@ Processing Time : {processing_time_ms:.1f}ms {'[OK]' if processing_time_ms < PER
                 "ai_message": ai_message
             }
             
-            # Push to Redis list
-            self._redis.lpush("alerts", json.dumps(alert))
-            
-            # Trim list to last 1000 alerts to prevent memory issues
-            self._redis.ltrim("alerts", 0, 999)
+            # Push to Redis list and trim to the last 1000 alerts to prevent
+            # memory issues, both in one round-trip
+            pipe = self._redis.pipeline()
+            pipe.lpush("alerts", orjson.dumps(alert))
+            pipe.ltrim("alerts", 0, 999)
+            pipe.execute()
             
             print(f"[REDIS] Saved alert for {result['domain']} (risk: {result['final_risk_score']:.2f})")
             
@@ -230,33 +234,53 @@ Processing Time : {processing_time_ms:.1f}ms {'[OK]' if processing_time_ms < PER
             f"time={processing_time_ms:.1f}ms [{status}]"
         )
 
-    def _handle_message(self, message: dict):
-        """Handle a single message from Redis."""
+    def _parse_message(self, message: dict) -> Optional[dict]:
+        """Decode a Redis message into a log event, or None if it should be skipped."""
         if message["type"] != "message":
-            return
-
-        start_time = time.perf_counter()
+            return None
 
         try:
-            log_data = json.loads(message["data"])
-        except json.JSONDecodeError as e:
+            log_data = orjson.loads(message["data"])
+        except orjson.JSONDecodeError as e:
             print(f"[ERROR] Invalid JSON: {e}")
-            return
+            return None
 
-        domain = log_data.get("domain")
-        if not domain:
+        if not log_data.get("domain"):
             print("[WARN] Log missing domain, skipping")
-            return
+            return None
 
-        try:
-            result = self._process_log(log_data)
-        except Exception as e:
-            print(f"[ERROR] Processing failed: {e}")
+        return log_data
+
+    def _handle_messages(self, messages: List[dict]):
+        """Handle a burst of messages from Redis with one behavior round-trip."""
+        start_time = time.perf_counter()
+
+        logs = [log for log in map(self._parse_message, messages) if log]
+        if not logs:
             return
 
-        processing_time_ms = (time.perf_counter() - start_time) * 1000
-        self._processed_count += 1
+        behavior_results = self._behavior_engine.analyze_many([
+            {"user_id": log.get("user_id", ""), "domain": log["domain"]}
+            for log in logs
+        ])
+        # Each event is charged the shared parse + behavior round-trip once,
+        # plus its own processing, never the reporting of earlier events
+        shared_time = time.perf_counter() - start_time
+
+        for log_data, behavior_result in zip(logs, behavior_results):
+            event_start = time.perf_counter()
+            try:
+                result = self._process_log(log_data, behavior_result)
+            except Exception as e:
+                print(f"[ERROR] Processing failed: {e}")
+                continue
+
+            processing_time_ms = (shared_time + time.perf_counter() - event_start) * 1000
+            self._processed_count += 1
+            self._report_result(result, log_data, processing_time_ms)
 
+    def _report_result(self, result: dict, log_data: dict, processing_time_ms: float):
+        """Print, store and notify according to the result's risk."""
         # Output based on risk level
         if result["final_risk_score"] > ALERT_THRESHOLD:
             self._alert_count += 1
@@ -315,7 +339,15 @@ Processing Time : {processing_time_ms:.1f}ms {'[OK]' if processing_time_ms < PER
             while self._running:
                 message = self._pubsub.get_message(timeout=1.0)
                 if message:
-                    self._handle_message(message)
+                    # Drain whatever else has already arrived so the burst
+                    # shares one Redis round-trip in the behavior engine
+                    messages = [message]
+                    while len(messages) < EVENT_BATCH_SIZE:
+                        message = self._pubsub.get_message()
+                        if not message:
+                            break
+                        messages.append(message)
+                    self._handle_messages(messages)
         except redis.ConnectionError:
             print("[ERROR] Redis connection lost")
         except Exception as e: